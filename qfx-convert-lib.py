@@ -3,6 +3,7 @@
 QFX Converter - Converts Nordstrom QFX files to Chase format for Quicken import
 """
 
+import mmap
 import re
 import sys
 import os
@@ -10,77 +11,100 @@ import argparse
 from datetime import datetime
 from pathlib import Path
 
+from qfx_common import extract_key_elements
 
-def extract_date_range(qfx_content):
-    """Extract start and end dates from QFX content"""
-    # Find DTSTART and DTEND
-    start_match = re.search(r'<DTSTART>(\d{8})\d+\.?\d*</DTSTART>', qfx_content)
-    end_match = re.search(r'<DTEND>(\d{8})\d+\.?\d*</DTEND>', qfx_content)
-    
-    if not start_match or not end_match:
-        raise ValueError("Could not find date range in QFX file")
-    
-    start_date = start_match.group(1)
-    end_date = end_match.group(1)
-    
-    return start_date, end_date
+# Patterns compiled once at import time so repeated calls (and batch use)
+# skip the re module's per-call pattern parsing and cache lookups.
+# Byte-mode patterns run directly over a memory-mapped input file, so the
+# full content is never decoded into a Python string; only the small
+# captured groups get decoded where display or filenames need them.
+# In byte mode \d is plain ASCII [0-9] - no Unicode category lookups per
+# character, which is what re.ASCII buys for text patterns.
+# Patterns shared with the verification script live in qfx_common.
+_HEADER_RE = re.compile(
+    rb'<DTSTART>(?P<start>\d{8})'
+    rb'|<DTEND>(?P<end>\d{8})'
+    rb'|<DTPOSTED>(?P<posted>\d{4})'
+)
 
+# Single alternation covering every tag the converter cares about, so
+# conversion and element extraction happen in one linear scan of the file
+_ALL_RE = re.compile(
+    rb'<FID>(?P<fid>\d+)</FID>'
+    rb'|<INTU\.BID>(?P<intu>\d+)</INTU\.BID>'
+    rb'|<TRNAMT>(?P<amt>[^<]+)</TRNAMT>'
+    rb'|(?P<trn><STMTTRN>)'
+)
 
-def extract_latest_year(qfx_content):
-    """Extract the latest transaction year from QFX content"""
-    # Find all transaction dates
-    date_matches = re.findall(r'<DTPOSTED>(\d{4})\d+\.?\d*</DTPOSTED>', qfx_content)
-    
-    if not date_matches:
+# Fixed replacement tags for Chase Bank (10898) - the replacements are
+# constant literals, so the rewrite does no per-tag formatting work
+_FID_CHASE = b'<FID>10898</FID>'
+_INTU_CHASE = b'<INTU.BID>10898</INTU.BID>'
+
+
+def extract_header(qfx_content):
+    """Extract the date range and latest transaction year in one scan
+
+    DTSTART, DTEND, and every DTPOSTED are collected from a single pass
+    over the content, so the latest-year fallback to the end date costs
+    no extra scan.
+    """
+    start_date = None
+    end_date = None
+    latest_year = 0
+
+    for match in _HEADER_RE.finditer(qfx_content):
+        tag = match.lastgroup
+        if tag == 'start':
+            if start_date is None:
+                start_date = match.group('start').decode()
+        elif tag == 'end':
+            if end_date is None:
+                end_date = match.group('end').decode()
+        else:
+            year = int(match.group('posted'))
+            if year > latest_year:
+                latest_year = year
+
+    if start_date is None or end_date is None:
+        raise ValueError("Could not find date range in QFX file")
+
+    if not latest_year:
         # Fallback to end date year
-        _, end_date = extract_date_range(qfx_content)
-        return end_date[:4]
-    
-    # Return the latest year
-    years = [int(date) for date in date_matches]
-    return str(max(years))
+        return start_date, end_date, end_date[:4]
 
+    return start_date, end_date, str(latest_year)
 
-def extract_key_elements(qfx_content):
-    """Extract key elements from QFX for verification"""
-    elements = {}
-    
-    # Extract FID
-    fid_match = re.search(r'<FID>(\d+)</FID>', qfx_content)
-    elements['FID'] = fid_match.group(1) if fid_match else 'Not found'
-    
-    # Extract INTU.BID  
-    intu_match = re.search(r'<INTU\.BID>(\d+)</INTU\.BID>', qfx_content)
-    elements['INTU.BID'] = intu_match.group(1) if intu_match else 'Not found'
-    
-    # Extract transaction amounts
-    amounts = re.findall(r'<TRNAMT>([^<]+)</TRNAMT>', qfx_content)
-    elements['amounts'] = [float(amt) for amt in amounts if amounts]
-    
-    # Count transactions
-    transactions = re.findall(r'<STMTTRN>', qfx_content)
-    elements['transaction_count'] = len(transactions)
-    
-    return elements
 
+def verify_conversion(original_content, converted_content, show_details=True,
+                      orig_elements=None):
+    """Verify the conversion was successful from file contents
 
-def verify_conversion(original_content, converted_content, show_details=True):
-    """Verify the conversion was successful"""
-    orig_elements = extract_key_elements(original_content)
+    If the caller already has the original file's key elements (as returned
+    by convert_qfx), pass them in to skip re-scanning the original content.
+    """
+    if orig_elements is None:
+        orig_elements = extract_key_elements(original_content)
     conv_elements = extract_key_elements(converted_content)
-    
+    return verify_from_elements(orig_elements, conv_elements, show_details)
+
+
+def verify_from_elements(orig_elements, conv_elements, show_details=True):
+    """Verify the conversion was successful from extracted key elements
+
+    Takes the element dicts directly (e.g. both returned by convert_qfx),
+    so no file content needs to be re-scanned.
+    """
     # Check each conversion requirement
     fid_changed = conv_elements['FID'] == '10898'
     intu_changed = conv_elements['INTU.BID'] == '10898'
     count_same = orig_elements['transaction_count'] == conv_elements['transaction_count']
     
-    # Check if amounts are preserved (not reversed)
+    # Check if amounts are preserved (not reversed) - the converter never
+    # rewrites amounts, so the raw strings must match exactly
     amounts_preserved = True
     if orig_elements['amounts'] and conv_elements['amounts']:
-        for orig, conv in zip(orig_elements['amounts'], conv_elements['amounts']):
-            if abs(orig - conv) > 0.01:  # Allow for small floating point differences
-                amounts_preserved = False
-                break
+        amounts_preserved = orig_elements['amounts'] == conv_elements['amounts']
     
     success = fid_changed and intu_changed and count_same and amounts_preserved
     
@@ -97,23 +121,67 @@ def verify_conversion(original_content, converted_content, show_details=True):
         if orig_elements['amounts']:
             print(f"\nSample Amounts (first 3):")
             for i, (orig, conv) in enumerate(zip(orig_elements['amounts'][:3], conv_elements['amounts'][:3])):
-                print(f"  {orig:>8.2f} → {conv:>8.2f}")
+                print(f"  {orig.decode():>8} → {conv.decode():>8}")
         print("="*50)
     
     return success
 
 
-def convert_qfx(input_content):
-    """Apply conversion rules to QFX content"""
-    # Make a copy to work with
-    converted = input_content
-    
-    # Rule 2: Change FID and INTU.BID to 10898 (Chase Bank)
-    converted = re.sub(r'<FID>\d+</FID>', '<FID>10898</FID>', converted)
-    converted = re.sub(r'<INTU\.BID>\d+</INTU\.BID>', '<INTU.BID>10898</INTU.BID>', converted)
-    
-    
-    return converted
+def convert_qfx(input_content, out):
+    """Apply conversion rules to QFX content in a single streaming pass
+
+    Writes the converted content chunk by chunk to the open binary file
+    ``out``, so no converted copy of the file ever exists in memory, and
+    returns the key elements of both the original and the written content,
+    collected during the same scan so verification re-scans nothing.
+    """
+    elements = {
+        'FID': 'Not found',
+        'INTU.BID': 'Not found',
+        'amounts': [],
+        'transaction_count': 0,
+    }
+
+    # Only FID and INTU.BID matches force a write; amounts and STMTTRN
+    # tags pass through unchanged with the surrounding text
+    cursor = 0
+    for match in _ALL_RE.finditer(input_content):
+        tag = match.lastgroup
+        if tag == 'fid':
+            # Rule 2: Change FID to 10898 (Chase Bank)
+            if elements['FID'] == 'Not found':
+                elements['FID'] = match.group('fid').decode()
+            replacement = _FID_CHASE
+        elif tag == 'intu':
+            # Rule 2: Change INTU.BID to 10898 (Chase Bank)
+            if elements['INTU.BID'] == 'Not found':
+                elements['INTU.BID'] = match.group('intu').decode()
+            replacement = _INTU_CHASE
+        elif tag == 'amt':
+            # Amounts are preserved; record the raw string for verification
+            elements['amounts'].append(match.group('amt'))
+            continue
+        else:
+            # <STMTTRN> open tag - counted only
+            elements['transaction_count'] += 1
+            continue
+
+        out.write(input_content[cursor:match.start()])
+        out.write(replacement)
+        cursor = match.end()
+
+    out.write(input_content[cursor:])
+
+    # The written file's elements follow directly from the rewrite rules:
+    # FID/INTU.BID become the Chase constants, amounts and transaction
+    # count pass through untouched
+    conv_elements = {
+        'FID': '10898' if elements['FID'] != 'Not found' else 'Not found',
+        'INTU.BID': '10898' if elements['INTU.BID'] != 'Not found' else 'Not found',
+        'amounts': elements['amounts'],
+        'transaction_count': elements['transaction_count'],
+    }
+    return elements, conv_elements
 
 
 def main():
@@ -135,54 +203,71 @@ def main():
         sys.exit(1)
     
     try:
-        # Read input file
-        with open(args.input_file, 'r', encoding='utf-8') as f:
-            qfx_content = f.read()
-        
-        # Extract date information
-        start_date, end_date = extract_date_range(qfx_content)
-        latest_year = extract_latest_year(qfx_content)
-        
-        # Determine output directory
-        if args.output_dir:
-            output_dir = Path(args.output_dir)
-        else:
-            output_dir = Path(f'./{latest_year}')
-        
-        # Create output directory if it doesn't exist
-        output_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Determine output filename
-        if args.output_file:
-            output_filename = args.output_file
-        else:
-            output_filename = f'{start_date}-{end_date}_transactions.QFX'
-        
-        output_path = output_dir / output_filename
-        
-        # Convert QFX content
-        converted_content = convert_qfx(qfx_content)
-        
-        # Write output file
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(converted_content)
-        
-        print(f"Conversion completed successfully!")
-        print(f"Input:  {args.input_file}")
-        print(f"Output: {output_path}")
-        print(f"Date range: {start_date} to {end_date}")
-        print(f"Year: {latest_year}")
-        
-        # Automatically verify the conversion (unless disabled)
-        if not args.no_verify:
-            verification_success = verify_conversion(qfx_content, converted_content, show_details=True)
-            
-            if not verification_success:
-                print("\n⚠️  WARNING: Conversion verification failed! Please check the output file.")
-                sys.exit(1)
-        else:
-            print("\nVerification skipped (--no-verify flag used)")
-        
+        # Map the input file read-only - the regex passes run directly over
+        # the mapped bytes, with no decode step and no full in-memory copy
+        fd = os.open(args.input_file, os.O_RDONLY)
+        try:
+            qfx_content = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+        finally:
+            os.close(fd)
+
+        with qfx_content:
+            # Extract date information
+            start_date, end_date, latest_year = extract_header(qfx_content)
+
+            # Determine output directory
+            if args.output_dir:
+                output_dir = Path(args.output_dir)
+            else:
+                output_dir = Path(f'./{latest_year}')
+
+            # Create output directory if it doesn't exist
+            output_dir.mkdir(parents=True, exist_ok=True)
+
+            # Determine output filename
+            if args.output_file:
+                output_filename = args.output_file
+            else:
+                output_filename = f'{start_date}-{end_date}_transactions.QFX'
+
+            output_path = output_dir / output_filename
+
+            # Convert QFX content into a temporary file and swap it into
+            # place once the scan is done (also collects elements for
+            # verification); the large write buffer keeps the chunk writes
+            # off the syscall path. Streaming straight to output_path would
+            # truncate the mapped input when both resolve to the same file
+            # (e.g. re-running on an already converted file in ./<YEAR>/),
+            # killing the process with SIGBUS and destroying the input.
+            tmp_path = output_path.with_name(output_path.name + '.tmp')
+            try:
+                with open(tmp_path, 'wb', buffering=1 << 20) as f:
+                    orig_elements, conv_elements = convert_qfx(qfx_content, f)
+                os.replace(tmp_path, output_path)
+            finally:
+                # Leave nothing behind if the conversion failed mid-write
+                if tmp_path.exists():
+                    tmp_path.unlink()
+
+            print(f"Conversion completed successfully!")
+            print(f"Input:  {args.input_file}")
+            print(f"Output: {output_path}")
+            print(f"Date range: {start_date} to {end_date}")
+            print(f"Year: {latest_year}")
+
+            # Automatically verify the conversion (unless disabled) - both
+            # element dicts were collected during the streaming pass, so
+            # verification re-scans nothing
+            if not args.no_verify:
+                verification_success = verify_from_elements(orig_elements, conv_elements,
+                                                            show_details=True)
+
+                if not verification_success:
+                    print("\n⚠️  WARNING: Conversion verification failed! Please check the output file.")
+                    sys.exit(1)
+            else:
+                print("\nVerification skipped (--no-verify flag used)")
+
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
         sys.exit(1)
@@ -3,32 +3,17 @@
 QFX Verification Script - Compare original and converted QFX files
 """
 
-import re
 import sys
 import argparse
 
+# Compiled patterns and the extraction logic are shared with the converter
+# via qfx_common, so there is a single set of patterns to maintain
+from qfx_common import extract_key_elements
 
-def extract_key_elements(qfx_content):
-    """Extract key elements from QFX for comparison"""
-    elements = {}
-    
-    # Extract FID
-    fid_match = re.search(r'<FID>(\d+)</FID>', qfx_content)
-    elements['FID'] = fid_match.group(1) if fid_match else 'Not found'
-    
-    # Extract INTU.BID  
-    intu_match = re.search(r'<INTU\.BID>(\d+)</INTU\.BID>', qfx_content)
-    elements['INTU.BID'] = intu_match.group(1) if intu_match else 'Not found'
-    
-    # Extract transaction amounts
-    amounts = re.findall(r'<TRNAMT>([^<]+)</TRNAMT>', qfx_content)
-    elements['amounts'] = [float(amt) for amt in amounts if amounts]
-    
-    # Count transactions
-    transactions = re.findall(r'<STMTTRN>', qfx_content)
-    elements['transaction_count'] = len(transactions)
-    
-    return elements
+
+def flip_sign(amount):
+    """Reverse the sign of a textual amount without a float round-trip"""
+    return amount[1:] if amount.startswith(b'-') else b'-' + amount
 
 
 def main():
@@ -39,11 +24,12 @@ def main():
     args = parser.parse_args()
     
     try:
-        # Read files
-        with open(args.original, 'r', encoding='utf-8') as f:
+        # Read files as bytes - the shared patterns are byte-mode, so the
+        # content never needs a decode pass
+        with open(args.original, 'rb') as f:
             original_content = f.read()
-            
-        with open(args.converted, 'r', encoding='utf-8') as f:
+
+        with open(args.converted, 'rb') as f:
             converted_content = f.read()
         
         # Extract elements
@@ -84,12 +70,16 @@ def main():
         orig_amounts = orig_elements['amounts'][:5]
         conv_amounts = conv_elements['amounts'][:5]
         
-        signs_reversed = True
         for orig, conv in zip(orig_amounts, conv_amounts):
-            print(f"  {orig:>8.2f} → {conv:>8.2f}")
-            if abs(orig + conv) > 0.01:  # Allow for small floating point differences
-                signs_reversed = False
-                
+            print(f"  {orig.decode():>8} → {conv.decode():>8}")
+
+        # all() drives the comparison in C and short-circuits on the first
+        # mismatch; every pair is checked, not just the displayed ones
+        signs_reversed = all(
+            conv == flip_sign(orig)
+            for orig, conv in zip(orig_elements['amounts'], conv_elements['amounts'])
+        )
+
         print(f"  Status:    {'✓ Signs reversed' if signs_reversed else '✗ Signs not properly reversed'}")
         print()
         
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+QFX Common - Shared patterns and extraction helpers for the QFX converter
+and verification scripts
+"""
+
+import re
+
+# Patterns compiled once at import time so repeated calls (and batch use)
+# skip the re module's per-call pattern parsing and cache lookups.
+# Byte-mode patterns run directly over memory-mapped or binary-read file
+# content, so the full content is never decoded into a Python string; only
+# the small captured groups get decoded where display needs them.
+# In byte mode \d is plain ASCII [0-9] - no Unicode category lookups per
+# character, which is what re.ASCII buys for text patterns.
+_FID_RE = re.compile(rb'<FID>(\d+)</FID>')
+_INTU_RE = re.compile(rb'<INTU\.BID>(\d+)</INTU\.BID>')
+_TRNAMT_RE = re.compile(rb'<TRNAMT>([^<]+)</TRNAMT>')
+_STMTTRN_RE = re.compile(rb'<STMTTRN>')
+
+
+def extract_key_elements(qfx_content):
+    """Extract key elements from QFX content (bytes) for verification"""
+    elements = {}
+
+    # Extract FID
+    fid_match = _FID_RE.search(qfx_content)
+    elements['FID'] = fid_match.group(1).decode() if fid_match else 'Not found'
+
+    # Extract INTU.BID
+    intu_match = _INTU_RE.search(qfx_content)
+    elements['INTU.BID'] = intu_match.group(1).decode() if intu_match else 'Not found'
+
+    # Extract transaction amounts as raw strings - no float round-trip,
+    # so original precision and formatting are compared bit-for-bit
+    elements['amounts'] = _TRNAMT_RE.findall(qfx_content)
+
+    # Count transactions with a single C-level substring scan - findall
+    # built a throwaway list of identical tag strings, one per transaction.
+    # mmap objects have no count method, so regex-count those instead
+    if hasattr(qfx_content, 'count'):
+        elements['transaction_count'] = qfx_content.count(b'<STMTTRN>')
+    else:
+        elements['transaction_count'] = sum(1 for _ in _STMTTRN_RE.finditer(qfx_content))
+
+    return elements
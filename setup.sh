@@ -23,6 +23,7 @@ INSTALL_DIR="/usr/local/bin"
 PYTHON_SCRIPT="$SCRIPT_DIR/qfx-convert-lib.py"
 SHELL_SCRIPT="$SCRIPT_DIR/qfx-convert"
 VERIFY_SCRIPT="$SCRIPT_DIR/qfx-convert-verify.py"
+COMMON_MODULE="$SCRIPT_DIR/qfx_common.py"
 
 echo "QFX Converter Setup"
 echo "==================="
@@ -43,6 +44,11 @@ if [ ! -f "$VERIFY_SCRIPT" ]; then
     exit 1
 fi
 
+if [ ! -f "$COMMON_MODULE" ]; then
+    echo "${RED}Error: qfx_common.py not found at $COMMON_MODULE${NC}" >&2
+    exit 1
+fi
+
 # Check if installation directory exists and is writable
 if [ ! -d "$INSTALL_DIR" ]; then
     echo "${RED}Error: Installation directory $INSTALL_DIR does not exist${NC}" >&2
@@ -77,6 +83,11 @@ echo "Installing qfx-convert-verify..."
 $SUDO_CMD cp "$VERIFY_SCRIPT" "$INSTALL_DIR/qfx-convert-verify"
 $SUDO_CMD chmod 755 "$INSTALL_DIR/qfx-convert-verify"
 
+# Copy the shared module (imported by both Python scripts)
+echo "Installing qfx_common.py..."
+$SUDO_CMD cp "$COMMON_MODULE" "$INSTALL_DIR/"
+$SUDO_CMD chmod 644 "$INSTALL_DIR/qfx_common.py"
+
 echo "${GREEN}Installation completed successfully!${NC}"
 echo
 echo "The qfx-convert command is now available system-wide."
@@ -86,4 +97,4 @@ echo "  qfx-convert /path/to/file.qfx        # Convert specific file"
 echo "  qfx-convert --help                   # Show help"
 echo
 echo "To uninstall, run:"
-echo "  sudo rm $INSTALL_DIR/qfx-convert-lib.py $INSTALL_DIR/qfx-convert $INSTALL_DIR/qfx-convert-verify"
+echo "  sudo rm $INSTALL_DIR/qfx-convert-lib.py $INSTALL_DIR/qfx-convert $INSTALL_DIR/qfx-convert-verify $INSTALL_DIR/qfx_common.py"